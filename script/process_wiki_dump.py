@@ -1,17 +1,27 @@
 # A script to parse a MediaWiki XML dump, clean the wikitext content,
 # and save it as a structured Markdown file using the wikitextparser library.
 
-import xml.etree.ElementTree as ET
+try:
+    # lxml is considerably faster at streaming large dumps; fall back to the standard library
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
 import wikitextparser as wtp
 from wikitextparser._wikitext import DeadIndexError
 import configparser
 import logging
+import logging.handlers
+import multiprocessing
 import time
 import re
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Set, Optional
+from typing import BinaryIO, Iterable, List, Optional, Tuple
 from urllib.parse import quote
 from tqdm import tqdm
 
@@ -35,10 +45,53 @@ def setup_logging(log_dir: str, log_level: str) -> None:
     )
     logging.info(f"Logging initialized. Log file at: {log_file}")
 
-def get_excluded_namespaces(config: configparser.ConfigParser) -> Set[str]:
-    """Reads the list of namespace prefixes to exclude from the config file."""
+def init_worker_logging(log_queue: multiprocessing.Queue, log_level: int) -> None:
+    """
+    Routes the log records of a worker process to the main process through a queue.
+    Runs in each worker at startup, so it works regardless of how the platform starts them.
+    """
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root_logger.setLevel(log_level)
+
+def get_excluded_namespaces(config: configparser.ConfigParser) -> Tuple[str, ...]:
+    """
+    Reads the list of namespace prefixes to exclude from the config file.
+    A tuple is returned so that all prefixes can be tested in one str.startswith() call.
+    """
     namespaces_str = config.get('parser', 'excluded_namespaces', fallback='')
-    return {ns.strip() for ns in namespaces_str.split(',') if ns.strip()}
+    return tuple(dict.fromkeys(ns.strip() for ns in namespaces_str.split(',') if ns.strip()))
+
+def iterparse_dump(filepath: str, events: Tuple[str, ...]):
+    """Opens a streaming parser over the dump, allowing very large text nodes with lxml."""
+    if HAS_LXML:
+        return ET.iterparse(filepath, events=events, huge_tree=True)
+    return ET.iterparse(filepath, events=events)
+
+def release_element(elem) -> None:
+    """
+    Frees a processed element. With lxml, the already processed siblings before it are
+    detached from the root as well, so the tree does not keep growing during the run.
+    """
+    if HAS_LXML:
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    else:
+        elem.clear()
+
+def get_page_text(page_elem, revision_tag: str, text_tag: str) -> str:
+    """
+    Returns the wikitext of a <page> element's revision, or an empty string if it has none.
+    The direct children are matched by tag instead of going through the XPath engine.
+    """
+    for child in page_elem:
+        if child.tag == revision_tag:
+            for grandchild in child:
+                if grandchild.tag == text_tag:
+                    return grandchild.text or ''
+            return ''
+    return ''
 
 def get_xml_namespace(filepath: str) -> Optional[str]:
     """
@@ -46,46 +99,199 @@ def get_xml_namespace(filepath: str) -> Optional[str]:
     This makes the script resilient to different MediaWiki export versions.
     """
     try:
-        for event, elem in ET.iterparse(filepath, events=('start-ns',)):
+        for event, elem in iterparse_dump(filepath, events=('start-ns',)):
             if elem[0] == '': return f"{{{elem[1]}}}"
     except (ET.ParseError, FileNotFoundError):
         return None
     return None
 
-def count_total_pages(filepath: str, page_tag: str) -> int:
-    """
-    Performs a fast, memory-efficient first pass of the XML to count the total
-    number of <page> elements, used for the progress bar.
-    """
-    count = 0
-    try:
-        for _, elem in ET.iterparse(filepath, events=('end',)):
-            if elem.tag == page_tag:
-                count += 1
-            elem.clear() # Essential for memory efficiency
-    except (ET.ParseError, FileNotFoundError):
-        return 0
-    return count
-
 # ==============================================================================
 # CORE PARSING LOGIC
 # ==============================================================================
 
+# Regex patterns are compiled once at import time, since they are applied to
+# every article (and, for the line-level ones, to every line) in the dump.
+_CATEGORY_LINK_RE = re.compile(r'\[\[Category:[^\]]*\]\]')
+_INFOBOX_RE = re.compile(r'infobox|sidebar|creature')
+_SI_ANY_RE = re.compile(r'\{\{\s*(?P<kind>sirange|si)\s*\|(?P<args>[^}]*)\}\}', re.IGNORECASE)
+_LINE_RE = re.compile(r'^(?:(?P<heading>={2,6})\s*(?P<htext>.*?)\s*=*\s*$|(?P<markers>[*#;:]+)\s*(?P<ltext>.*))')
+_TERM_SPLIT_RE = re.compile(r':\s')
+_PAREN_GROUP_RE = re.compile(r'\((.*?)\)')
+_WIKI_MARKUP_RE = re.compile(r"[\[\]{}'<>&]")
+_CLEANUP_RE = re.compile(r'\s+([,.!?)])|\(\s*[;,]\s*\)')
+
+# Pages with less wikitext than this are skipped, as they cannot hold a meaningful article.
+_MIN_WIKITEXT_LENGTH = 50
+
+# Number of pages handed to a worker process at a time. Large enough to amortize
+# the cost of pickling pages to and from the workers.
+_WORKER_CHUNKSIZE = 16
+
+# Size of the output file buffer, so that pages are flushed to disk in large writes.
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+def _si_replace(match: re.Match) -> str:
+    """
+    Rewrites a single {{SI}} or {{SIrange}} template match into plain text.
+    Only the leading non-empty arguments are used; anything after them is dropped.
+    """
+    args = match.group('args').split('|')
+    if match.group('kind').lower() == 'sirange':
+        if len(args) < 2 or not args[0] or not args[1]:
+            return match.group(0)
+        if len(args) >= 3 and args[2]:
+            return f"{args[0]}–{args[1]} {args[2]}"
+        return f"{args[0]}–{args[1]}"
+    if not args[0]:
+        return match.group(0)
+    if len(args) >= 2 and args[1]:
+        return f"{args[0]} {args[1]}"
+    return args[0]
+
+def _plain_text(value: Optional[str]) -> str:
+    """
+    Returns the plain text of a small wikitext fragment (a table cell or template argument).
+    Fragments without any markup characters are returned as-is, skipping a full parse.
+    """
+    if not value: # Missing cells in ragged tables come back as None
+        return ""
+    if not _WIKI_MARKUP_RE.search(value):
+        return value
+    return wtp.parse(value).plain_text()
+
+def _transform_lines(raw_text: str) -> List[str]:
+    """
+    Converts the plain text of an article into a list of "raw" Markdown lines.
+    Empty strings in the result mark the boundaries between blocks.
+    """
+    lines = raw_text.splitlines()
+    transformed_lines = []
+    # Bind the hot lookups to locals once, as this loop runs for every line of every article
+    append = transformed_lines.append
+    num_lines = len(lines)
+    # Running item numbers of the ordered lists currently open, indexed by nesting depth,
+    # and the line count right after the last list item, to notice when a list was interrupted.
+    ordered_counters = []
+    list_end = 0
+
+    i = 0
+    while i < num_lines:
+        line = lines[i]
+        stripped_line = line.strip()
+
+        # Filter out unwanted lines (metadata, etc.). The lowercase copy is only made
+        # once the cheaper case-sensitive checks have failed.
+        is_unwanted = not stripped_line or \
+                      not stripped_line.strip('• ') or \
+                      stripped_line.startswith('Category:')
+        if not is_unwanted:
+            lower_stripped_line = stripped_line.lower()
+            is_unwanted = lower_stripped_line.startswith(('main article:', 'for a list of')) or \
+                          ':category:' in lower_stripped_line
+        if is_unwanted:
+            append('')
+            i += 1
+            continue
+
+        # Context-aware merge for list items with descriptions on the next line
+        if transformed_lines and transformed_lines[-1].endswith(':') and \
+           not stripped_line.startswith(('*', '#', ';', ':', '=')):
+            transformed_lines[-1] = transformed_lines[-1] + ' ' + stripped_line
+            i += 1
+            continue
+
+        # Headings and list items are matched in one go. Plain prose lines, by far the
+        # most common case, cannot be either, so they skip the regex entirely.
+        line_match = _LINE_RE.match(stripped_line) if stripped_line[0] in '=*#;:' else None
+
+        # Handle headings
+        if line_match and line_match.group('heading'):
+            level = len(line_match.group('heading'))
+            title = line_match.group('htext').strip().rstrip(':')
+            append(f"{'#' * level} {title}")
+            i += 1
+            continue
+
+        # Handle lists and pseudo-headers
+        if line_match:
+            markers = line_match.group('markers')
+            item_text = line_match.group('ltext').strip()
+
+            # Context-aware check for single-item lists acting as subheadings
+            if markers == '*':
+                is_subheading = True
+                next_line_index = i + 1
+                while next_line_index < num_lines:
+                    next_line = lines[next_line_index].strip()
+                    if next_line:
+                        if next_line.startswith('*'):
+                            is_subheading = False
+                        break
+                    next_line_index += 1
+                if is_subheading:
+                    append(f"**{item_text.rstrip(':')}:**")
+                    i += 1
+                    continue
+
+            # Default list/pseudo-header processing
+            if markers.startswith(';'):
+                full_term_line = (markers[1:] + item_text).strip()
+                parts = _TERM_SPLIT_RE.split(full_term_line, 1)
+                term = parts[0].strip().rstrip(':')
+                definition = parts[1].strip() if len(parts) > 1 else ""
+                append(f"**{term}:**" + (f" {definition}" if definition else ""))
+            elif markers.startswith(':'):
+                 if '•' in item_text:
+                    item_text = _PAREN_GROUP_RE.sub(lambda m: f"({m.group(1).replace('•', ', ')})", item_text)
+                    items = [item.strip() for item in item_text.split('•') if item.strip()]
+                    transformed_lines.extend([f"- {item}" for item in items])
+                 else:
+                    append(item_text)
+            else: # Standard '*' and '#' lists
+                depth = len(markers) - 1
+                indent = "  " * depth
+                if list_end != len(transformed_lines): # Any other line ends all open lists
+                    ordered_counters.clear()
+                if markers.endswith('*'):
+                    del ordered_counters[depth:]
+                    marker = '-'
+                else: # Number ordered items directly, restarting nested lists under each new item
+                    ordered_counters.extend([0] * (depth + 1 - len(ordered_counters)))
+                    del ordered_counters[depth + 1:]
+                    ordered_counters[depth] += 1
+                    marker = f"{ordered_counters[depth]}."
+                if item_text.endswith(':'):
+                    item_text = item_text.rstrip(':').strip()
+                append(f"{indent}{marker} {item_text}")
+                list_end = len(transformed_lines)
+        else:
+            append(stripped_line)
+
+        i += 1
+
+    return transformed_lines
+
 def clean_wikitext(wikitext: str, page_title: str) -> str:
     """
     Parses wikitext using a robust, structure-aware process with a final formatting pass.
     """
-    if not wikitext or wikitext.lower().strip().startswith('#redirect'):
+    if not wikitext:
+        return ""
+
+    # Skip pages that can only produce (near-)empty output before paying for a full parse:
+    # very short pages, redirects, disambiguation pages and pages holding nothing but categories.
+    head = wikitext.lstrip()[:20].lower()
+    if len(wikitext) < _MIN_WIKITEXT_LENGTH or head.startswith(('#redirect', '{{disambig', '{{hndis')):
+        return ""
+    category_links = wikitext.count('[[Category:')
+    if category_links and category_links == wikitext.count('[[') and not _CATEGORY_LINK_RE.sub('', wikitext).strip():
         return ""
 
     # Pass 1: Pre-processing with Regex.
     # This step handles specific data-carrying templates (like for units of measurement)
     # BEFORE the main parser sees them. This is a robust way to prevent data loss.
     try:
-        wikitext = re.sub(r'\{\{\s*(?:sirange|SIrange)\s*\|([^}|]+)\|([^}|]+)\|([^}|]+)[^}]*\}\}', r'\1–\2 \3', wikitext, flags=re.IGNORECASE)
-        wikitext = re.sub(r'\{\{\s*(?:sirange|SIrange)\s*\|([^}|]+)\|([^}|]+)[^}]*\}\}', r'\1–\2', wikitext, flags=re.IGNORECASE)
-        wikitext = re.sub(r'\{\{\s*(?:si|SI)\s*\|([^}|]+)\|([^}|]+)[^}]*\}\}', r'\1 \2', wikitext, flags=re.IGNORECASE)
-        wikitext = re.sub(r'\{\{\s*(?:si|SI)\s*\|([^}|]+)[^}]*\}\}', r'\1', wikitext, flags=re.IGNORECASE)
+        wikitext = _SI_ANY_RE.sub(_si_replace, wikitext)
 
         parsed = wtp.parse(wikitext)
     except Exception as e:
@@ -96,7 +302,7 @@ def clean_wikitext(wikitext: str, page_title: str) -> str:
     templates_to_remove = {'navbox', 'stub', 'cleanup', 'citation needed', 'clarify', 'fact', 'update', 'wip', 'refs', 'see also', 'main', 'details'}
 
     # Pass 2: Remove large, unwanted sections by title.
-    for section in parsed.sections[:]:
+    for section in parsed.sections:
         try:
             if section.title and section.title.strip().lower() in sections_to_remove:
                 del section[:]
@@ -104,12 +310,18 @@ def clean_wikitext(wikitext: str, page_title: str) -> str:
         except Exception as e: logging.warning(f"Could not remove a section in '{page_title}': {e}")
 
     # Pass 3: Handle cosmetic and structural templates.
-    for template in parsed.templates[:]:
+    for template in parsed.templates:
         try:
             template_name = template.name.strip().lower()
 
-            if any(infobox_name in template_name for infobox_name in {'infobox', 'sidebar', 'creature'}):
-                infobox_content = [f"- **{arg.name.strip()}:** {wtp.parse(arg.value.strip()).plain_text().strip()}" for arg in template.arguments if arg.name and arg.value and wtp.parse(arg.value.strip()).plain_text().strip()]
+            if _INFOBOX_RE.search(template_name):
+                infobox_content = []
+                for arg in template.arguments:
+                    arg_name, arg_value = arg.name, arg.value
+                    if arg_name and arg_value:
+                        value_text = _plain_text(arg_value.strip()).strip() # Converted once, used for both the check and the output
+                        if value_text:
+                            infobox_content.append(f"- **{arg_name.strip()}:** {value_text}")
                 template.string = "\n".join(infobox_content) if infobox_content else ""
             elif template_name in templates_to_remove:
                 del template[:]
@@ -130,7 +342,7 @@ def clean_wikitext(wikitext: str, page_title: str) -> str:
             except (ValueError, IndexError, DeadIndexError): pass
 
     # Pass 4: Find and convert all tables to Markdown.
-    for table in parsed.tables[:]:
+    for table in parsed.tables:
         try:
             table_data = table.data()
             if not table_data or not table_data[0]:
@@ -138,7 +350,7 @@ def clean_wikitext(wikitext: str, page_title: str) -> str:
                 continue
 
             markdown_table = []
-            header = [wtp.parse(str(cell)).plain_text().replace('\n', ' ').strip() for cell in table_data[0]]
+            header = [_plain_text(cell).replace('\n', ' ').strip() for cell in table_data[0]]
 
             if not any(h for h in header):
                 del table[:]
@@ -148,7 +360,7 @@ def clean_wikitext(wikitext: str, page_title: str) -> str:
             markdown_table.append("| " + " | ".join(['---'] * len(header)) + " |")
 
             for row in table_data[1:]:
-                cleaned_row = [wtp.parse(str(cell)).plain_text().replace('\n', ' ').strip() for cell in row]
+                cleaned_row = [_plain_text(cell).replace('\n', ' ').strip() for cell in row]
                 if len(cleaned_row) == len(header):
                     markdown_table.append("| " + " | ".join(cleaned_row) + " |")
 
@@ -164,134 +376,85 @@ def clean_wikitext(wikitext: str, page_title: str) -> str:
                 pass
 
     # Pass 5: Convert the parsed object into a list of "raw" Markdown lines.
-    raw_text = parsed.plain_text()
-    lines = raw_text.split('\n')
-    transformed_lines = []
-
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        stripped_line = line.strip()
-        lower_stripped_line = stripped_line.lower()
-
-        # Filter out unwanted lines (metadata, etc.)
-        if not stripped_line or \
-           all(c in '• ' for c in stripped_line) or \
-           stripped_line.startswith('Category:') or \
-           lower_stripped_line.startswith('main article:') or \
-           lower_stripped_line.startswith('for a list of') or \
-           ':category:' in lower_stripped_line:
-            transformed_lines.append('')
-            i += 1
-            continue
-
-        # Context-aware merge for list items with descriptions on the next line
-        if transformed_lines and transformed_lines[-1].endswith(':') and \
-           not stripped_line.startswith(('*', '#', ';', ':', '=')):
-            transformed_lines[-1] = transformed_lines[-1] + ' ' + stripped_line
-            i += 1
-            continue
-
-        # Handle headings
-        heading_match = re.match(r'^\s*(={2,6})\s*(.*?)\s*(=*)\s*$', stripped_line)
-        if heading_match:
-            level = len(heading_match.group(1))
-            title = heading_match.group(2).strip().rstrip(':')
-            transformed_lines.append(f"{'#' * level} {title}")
-            i += 1
-            continue
-
-        # Handle lists and pseudo-headers
-        list_match = re.match(r'^([*#;:]+)\s*(.*)', stripped_line)
-        if list_match:
-            markers, item_text = list_match.groups()
-            item_text = item_text.strip()
-
-            # Context-aware check for single-item lists acting as subheadings
-            if markers == '*':
-                is_subheading = True
-                next_line_index = i + 1
-                while next_line_index < len(lines):
-                    next_line = lines[next_line_index].strip()
-                    if next_line:
-                        if next_line.startswith('*'):
-                            is_subheading = False
-                        break
-                    next_line_index += 1
-                if is_subheading:
-                    transformed_lines.append(f"**{item_text.rstrip(':')}:**")
-                    i += 1
-                    continue
-
-            # Default list/pseudo-header processing
-            if markers.startswith(';'):
-                full_term_line = (markers[1:] + item_text).strip()
-                parts = re.split(r':\s', full_term_line, 1)
-                term = parts[0].strip().rstrip(':')
-                definition = parts[1].strip() if len(parts) > 1 else ""
-                transformed_lines.append(f"**{term}:**" + (f" {definition}" if definition else ""))
-            elif markers.startswith(':'):
-                 if '•' in item_text:
-                    item_text = re.sub(r'\((.*?)\)', lambda m: f"({m.group(1).replace('•', ', ')})", item_text)
-                    items = [item.strip() for item in item_text.split('•') if item.strip()]
-                    transformed_lines.extend([f"- {item}" for item in items])
-                 else:
-                    transformed_lines.append(item_text)
-            else: # Standard '*' and '#' lists
-                indent = "  " * (len(markers) - 1)
-                marker = '-' if markers.endswith('*') else '1.'
-                if item_text.endswith(':'):
-                    item_text = item_text.rstrip(':').strip()
-                transformed_lines.append(f"{indent}{marker} {item_text}")
-        else:
-            transformed_lines.append(stripped_line)
-
-        i += 1
+    transformed_lines = _transform_lines(parsed.plain_text())
 
     # Pass 6: Assemble the final text with consistent block spacing.
-    final_output = []
-    blocks = []
-    current_block = []
+    # Lines and their separators go into a single list that is joined once at the end.
+    parts = []
+    in_block = False
     for line in transformed_lines:
         if line.strip():
-            current_block.append(line)
+            if parts:
+                parts.append('\n' if in_block else '\n\n')
+            parts.append(line)
+            in_block = True
         else:
-            if current_block:
-                blocks.append('\n'.join(current_block))
-            current_block = []
-    if current_block:
-        blocks.append('\n'.join(current_block))
+            in_block = False
 
-    final_text = '\n\n'.join(blocks)
+    final_text = ''.join(parts)
 
     # Pass 7: Final aesthetic cleanup.
-    final_text = re.sub(r'\s+([,.!?)])', r'\1', final_text) # Fix spacing before punctuation
-    final_text = re.sub(r'\(\s*[;,]\s*\)', '', final_text) # Remove artifacts like (;)
-
-    # Renumber ordered lists for clean raw Markdown.
-    def renumber_list(match):
-        list_block = match.group(0)
-        lines = list_block.strip().split('\n')
-        indent_match = re.match(r'^(\s*)', lines[0])
-        indent = indent_match.group(1) if indent_match else ""
-
-        renumbered_lines = []
-        for i, line in enumerate(lines):
-            # Perform the substitution outside of the f-string
-            text_content = re.sub(r'^\s*1\.\s*', '', line)
-            renumbered_lines.append(f"{indent}{i + 1}. {text_content}")
-
-        return '\n'.join(renumbered_lines)
-
-    list_pattern = re.compile(r'((?:^[ \t]*1\..*(?:\n|$))+)', re.MULTILINE)
-    final_text = list_pattern.sub(renumber_list, final_text)
+    # Fix spacing before punctuation and remove artifacts like (;) in a single pass.
+    final_text = _CLEANUP_RE.sub(lambda m: m.group(1) or '', final_text)
 
     return final_text
 
+def clean_wikitext_wrapper(page: Tuple[str, str]) -> str:
+    """
+    Entry point for the worker processes: cleans a single (title, wikitext) page.
+    Errors are logged and yield an empty result, so one bad page cannot stop the run.
+    """
+    title, wikitext = page
+    try:
+        return clean_wikitext(wikitext, title)
+    except Exception as e:
+        logging.error(f"Failed to process page '{title}': {e}", exc_info=True)
+        return ""
+
 # ==============================================================================
 # MAIN ORCHESTRATION
 # ==============================================================================
 
+def write_pages(outfile: BinaryIO, batch: List[Tuple[str, str]], results: Iterable[str], base_url: Optional[str]) -> int:
+    """
+    Writes the cleaned pages of a batch to the output file, in the order they appear in the dump.
+    Each page is encoded to UTF-8 once and written as a single chunk of bytes.
+    Returns the number of articles written.
+    """
+    written = 0
+    for (title, _), cleaned_text in zip(batch, results):
+        if cleaned_text:
+            source_line = ""
+            if base_url:
+                url_title = quote(title.replace(' ', '_'))
+                full_url = base_url + url_title
+                source_line = f"> Article source: {full_url}\n\n"
+            outfile.write(''.join([f"# {title}\n\n", source_line, cleaned_text, "\n\n---\n\n"]).encode('utf-8'))
+            written += 1
+    return written
+
+@contextmanager
+def worker_pool(num_workers: int):
+    """
+    Yields a process pool for cleaning pages, or None when running in a single process.
+    Log records from the workers are handed to the main process's handlers (file and console).
+    """
+    if num_workers == 1:
+        yield None
+        return
+
+    root_logger = logging.getLogger()
+    log_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    listener.start()
+    try:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=init_worker_logging,
+                                 initargs=(log_queue, root_logger.level)) as executor:
+            yield executor
+    finally:
+        # The pool has shut down at this point, so every worker record is already queued
+        listener.stop()
+
 def process_dump(config: configparser.ConfigParser, script_dir: str) -> None:
     """
     Main function to read the XML dump, iterate through pages, and write the output.
@@ -312,9 +475,15 @@ def process_dump(config: configparser.ConfigParser, script_dir: str) -> None:
     start_index = config.getint('parser', 'start_index', fallback=0)
     end_index = config.getint('parser', 'end_index', fallback=0)
     license_text = config.get('output', 'license_text', fallback=None)
+    num_workers = config.getint('parser', 'num_workers', fallback=0)
+    if num_workers < 0:
+        logging.critical(f"Invalid num_workers value {num_workers} in the config: it must be 0 or greater.")
+        return
+    num_workers = num_workers or os.cpu_count() or 1
 
     logging.info(f"Input file: {input_path}")
     logging.info(f"Output file: {output_path}")
+    logging.info(f"Worker processes: {num_workers}")
 
     # Dynamically find the XML namespace to avoid parsing errors.
     logging.info("Detecting XML namespace from the dump file...")
@@ -330,81 +499,80 @@ def process_dump(config: configparser.ConfigParser, script_dir: str) -> None:
     # Define XML tags based on the detected namespace
     page_tag = f'{xml_namespace}page'
     title_path = f'./{xml_namespace}title'
-    revision_path = f'./{xml_namespace}revision'
-    text_path = f'./{xml_namespace}text'
+    revision_tag = f'{xml_namespace}revision'
+    text_tag = f'{xml_namespace}text'
 
-    logging.info("Performing a quick scan to count total pages...")
-    total_pages = count_total_pages(input_path, page_tag)
-    if total_pages == 0:
-        logging.critical(f"No <page> elements found using namespace '{xml_namespace}'.")
-        return
-    logging.info(f"Found {total_pages} total pages. Starting main processing...")
+    logging.info("Starting main processing...")
 
     page_count = 0
     processed_count = 0
     try:
-        with open(output_path, 'w', encoding='utf-8') as outfile:
+        with open(output_path, 'wb', buffering=_OUTPUT_BUFFER_SIZE) as outfile:
             # Add license header to the output file if provided in the config
             if license_text:
-                outfile.write(f"{license_text.strip()}\n\n---\n\n")
+                outfile.write(f"{license_text.strip()}\n\n---\n\n".encode('utf-8'))
 
             # Use iterparse for memory-efficient streaming of the large XML file.
-            context = ET.iterparse(input_path, events=('end',))
+            context = iterparse_dump(input_path, events=('end',))
+
+            # The dump is streamed in a single pass, so the total number of pages is only
+            # known up front when an end index is set. Otherwise the bar is open-ended.
+            pbar_total = None
+            if end_index > 0 and end_index >= start_index:
+                pbar_total = end_index - max(start_index, 1) + 1
+
+            # Pages are read from the XML in the main process and cleaned in batches by a pool
+            # of worker processes. While one batch is being cleaned, the next one is read.
+            batch_size = num_workers * _WORKER_CHUNKSIZE * 4
+            batch = []
+            pending = None # The previous batch and its (lazy) results, not yet written
 
-            pbar_total = total_pages
-            if start_index > 0:
-                if end_index > 0 and end_index >= start_index:
-                    pbar_total = end_index - start_index + 1
-                else:
-                    pbar_total = total_pages - start_index + 1 if total_pages > start_index else 0
+            with worker_pool(num_workers) as executor, \
+                 tqdm(total=pbar_total, desc="Processing pages", unit=" pages", ascii=True, file=sys.stderr) as pbar:
+
+                def submit(pages):
+                    if executor is None:
+                        return pages, map(clean_wikitext_wrapper, pages)
+                    return pages, executor.map(clean_wikitext_wrapper, pages, chunksize=_WORKER_CHUNKSIZE)
 
-            with tqdm(total=pbar_total, desc="Processing pages", unit=" pages", ascii=True, file=sys.stderr) as pbar:
                 for _, elem in context:
                     if elem.tag == page_tag:
                         page_count += 1
                         # Handle slicing logic to process only a subset of pages
                         if start_index > 0 and page_count < start_index:
-                            elem.clear()
+                            release_element(elem)
                             continue
                         if end_index > 0 and page_count > end_index:
                             logging.info(f"Reached end index {end_index}. Stopping.")
-                            elem.clear()
+                            release_element(elem)
                             break
 
                         if (start_index == 0) or (page_count >= start_index):
                            pbar.update(1)
 
-                        title_elem = elem.find(title_path)
-                        revision_elem = elem.find(revision_path)
-                        title = title_elem.text if title_elem is not None else ''
-                        wikitext = ''
-                        if revision_elem is not None:
-                            text_elem = revision_elem.find(text_path)
-                            if text_elem is not None and text_elem.text:
-                                wikitext = text_elem.text
-
-                        if title and wikitext:
-                            # Filter pages based on namespace
-                            if 'talk:' in title.lower() or any(title.startswith(ns) for ns in excluded_namespaces):
+                        title = elem.findtext(title_path, default='')
+                        if title:
+                            # Filter pages based on namespace before looking up their text
+                            if title.startswith(excluded_namespaces) or 'talk:' in title.lower():
                                 logging.debug(f"Skipping page in excluded namespace: {title}")
                             else:
-                                try:
-                                    # Call the main cleaning function
-                                    cleaned_text = clean_wikitext(wikitext, title)
-                                    if cleaned_text:
-                                        outfile.write(f"# {title}\n\n")
-                                        if base_url:
-                                            url_title = quote(title.replace(' ', '_'))
-                                            full_url = base_url + url_title
-                                            outfile.write(f"> Article source: {full_url}\n\n")
-                                        outfile.write(cleaned_text)
-                                        outfile.write("\n\n---\n\n")
-                                        processed_count += 1
-                                except Exception as e:
-                                    logging.error(f"Failed to process page '{title}': {e}", exc_info=True)
+                                wikitext = get_page_text(elem, revision_tag, text_tag)
+                                if wikitext:
+                                    batch.append((title, wikitext))
+                                    if len(batch) >= batch_size:
+                                        submitted = submit(batch)
+                                        if pending:
+                                            processed_count += write_pages(outfile, *pending, base_url)
+                                        pending, batch = submitted, []
 
                         # Clear the element from memory to prevent high memory usage
-                        elem.clear()
+                        release_element(elem)
+
+                # Flush the pages that are still in flight
+                if pending:
+                    processed_count += write_pages(outfile, *pending, base_url)
+                if batch:
+                    processed_count += write_pages(outfile, *submit(batch), base_url)
 
     except (FileNotFoundError, ET.ParseError) as e:
         logging.critical(f"A critical error occurred during file processing: {e}", exc_info=True)
@@ -413,6 +581,10 @@ def process_dump(config: configparser.ConfigParser, script_dir: str) -> None:
         logging.critical(f"An unexpected error occurred: {e}", exc_info=True)
         return
 
+    if page_count == 0:
+        logging.critical(f"No <page> elements found using namespace '{xml_namespace}'.")
+        return
+
     logging.info("Processing complete.")
     logging.info(f"Total articles processed and saved: {processed_count}.")
 